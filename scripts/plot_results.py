@@ -13,17 +13,56 @@ Prerequisites:
     - python3
     - matplotlib
     - numpy
+    - pandas
+    - pyarrow (optional; faster CSV parsing and the results/.cache/ Parquet cache)
 """
 
-import csv
-import glob
+import json
+import multiprocessing
 import os
+import matplotlib
+matplotlib.use('Agg') # Charts are only written to disk; skip GUI backend probing
 import matplotlib.pyplot as plt
 import numpy as np
-from collections import defaultdict
-
-# Set chart style
-plt.style.use('ggplot') 
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from matplotlib.collections import LineCollection
+from matplotlib.lines import Line2D
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa_csv = None # Optional; CSVs are then parsed by pandas' C reader
+
+# Chart style: the parts of matplotlib's 'ggplot' sheet these charts show (every series
+# colour is explicit), set directly instead of loading and applying the whole style file
+plt.rcParams.update({
+    'patch.linewidth': 0.5,
+    'patch.facecolor': '#348ABD',
+    'patch.edgecolor': '#EEEEEE',
+    'axes.facecolor': '#E5E5E5',
+    'axes.edgecolor': 'white',
+    'axes.linewidth': 1,
+    'axes.grid': True,
+    'axes.titlesize': 'x-large',
+    'axes.labelsize': 'large',
+    'axes.labelcolor': '#555555',
+    'axes.axisbelow': True,
+    'xtick.color': '#555555',
+    'xtick.direction': 'out',
+    'ytick.color': '#555555',
+    'ytick.direction': 'out',
+    'grid.color': 'white',
+    'grid.linestyle': '-'
+})
+# Let Agg drop near-collinear vertices and render long paths in chunks
+plt.rcParams.update({
+    'path.simplify': True,
+    'path.simplify_threshold': 1.0,
+    'agg.path.chunksize': 10000
+})
 RESULTS_DIR = "results"
 
 # ==========================================
@@ -45,6 +84,12 @@ COLOR_MAP_IMPL = {
     'none':          ('lightgreen', 'darkgreen')
 }
 
+# Line chart colour per implementation (dark shade); all series share the remaining style
+LINE_COLOR = {impl: dark for impl, (_, dark) in COLOR_MAP_IMPL.items()}
+LINE_COLOR_DEFAULT = 'black'
+LINE_STYLE = dict(linewidth=2.5, alpha=0.9)
+LINE_MARKER = 'o'
+
 # Color mapping for different optimization modes (Spot Check)
 COLOR_MAP_MODE = {
     'NoPool / NoBO':   '#E24A33', # Red
@@ -53,237 +98,423 @@ COLOR_MAP_MODE = {
     'Pool / Backoff':  '#8EBA42'  # Green
 }
 
+# Spot Check bar order (matches the COLOR_MAP_MODE order)
+MODES_ORDER = list(COLOR_MAP_MODE)
+
+# Mode shown by the line and latency charts (the configuration of the main matrix)
+TARGET_MODE = "Pool / Backoff"
+
+# Latency Distribution bars: metric column -> (legend label, color)
+LATENCY_BARS = {
+    'p50':     ('P50', 'skyblue'),
+    'p99':     ('P99', 'orange'),
+    'p999':    ('P99.9', 'firebrick'),
+    'max_lat': ('Max', 'purple')
+}
+
+@lru_cache(maxsize=None) # Four possible flag combinations
 def get_mode_name(is_pool, is_backoff):
     """Generates a human-readable mode name based on configuration flags."""
     pool_str = "Pool" if is_pool else "NoPool"
     bo_str = "Backoff" if is_backoff else "NoBO"
     return f"{pool_str} / {bo_str}"
 
+# Column types of the CSV written by `bench_queue --csv`
+CSV_DTYPES = {
+    'impl': str,
+    'P': 'int32',
+    'C': 'int32',
+    'payload_us': 'int32',
+    'throughput_prod': 'float64',
+    'throughput_cons': 'float64',
+    'avg_lat': 'float64',
+    'p50': 'float64',
+    'p99': 'float64',
+    'p999': 'float64',
+    'max_lat': 'float64',
+    'max_depth': 'int64',
+    'peak_mem_kb': 'int64'
+}
+
+# Same schema for pyarrow's multithreaded reader (columns absent from a file are ignored)
+if pa_csv is not None:
+    ARROW_CONVERT_OPTIONS = pa_csv.ConvertOptions(column_types={
+        col: pa.string() if dtype is str else pa.from_numpy_dtype(np.dtype(dtype))
+        for col, dtype in CSV_DTYPES.items()})
+
+# Keys identifying one configuration (repeated runs are aggregated)
+GROUP_KEYS = ['raw_impl', 'is_pool', 'is_backoff', 'mode_name', 'P', 'C', 'payload_us']
+
+METRICS = ['throughput_prod', 'throughput_cons',
+           'avg_lat', 'p50', 'p99', 'p999', 'max_lat',
+           'peak_mem_kb', 'max_depth']
+
+# Latency columns are reported in ns and plotted in us
+LATENCY_COLS = ['avg_lat', 'p50', 'p99', 'p999', 'max_lat']
+
+# Incremental cache: one Parquet shard per parsed CSV, the aggregate of the last run,
+# and a manifest of the (mtime, size) stamps both were built from
+CACHE_DIR = os.path.join(RESULTS_DIR, ".cache")
+SHARD_DIR = os.path.join(CACHE_DIR, "shards")
+AGGREGATE_CACHE = os.path.join(CACHE_DIR, "aggregate.parquet")
+MANIFEST_FILE = os.path.join(CACHE_DIR, "manifest.json")
+
+def file_stamp(path):
+    """Returns the [mtime_ns, size] pair used to detect a changed file."""
+    st = os.stat(path)
+    return [st.st_mtime_ns, st.st_size]
+
+def read_manifest():
+    """Returns the cached file stamps, or {} if there is no cache built by this script version."""
+    try:
+        with open(MANIFEST_FILE) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if manifest.get('script') != file_stamp(__file__):
+        return {} # Parsing or aggregation code may have changed
+    return manifest.get('files', {})
+
+def write_manifest(stamps):
+    """Writes the manifest atomically so an interrupted run never leaves a half-written one."""
+    tmp = MANIFEST_FILE + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump({'script': file_stamp(__file__), 'files': stamps}, f)
+    os.replace(tmp, MANIFEST_FILE)
+
+def shard_path(filename):
+    return os.path.join(SHARD_DIR, os.path.basename(filename) + ".parquet")
+
+def load_result_file(filename, cached_stamp, stamp):
+    """Reads the file's shard if it is still current, otherwise parses the CSV and refreshes it."""
+    if cached_stamp == stamp:
+        try:
+            return pd.read_parquet(shard_path(filename))
+        except (OSError, ValueError, ImportError):
+            pass
+    df = read_result_file(filename)
+    if df is None:
+        # A shard from an earlier, valid version of the file must not outlive it
+        try:
+            os.remove(shard_path(filename))
+        except FileNotFoundError:
+            pass
+        return None
+    try:
+        df.to_parquet(shard_path(filename), compression='zstd')
+    except ImportError:
+        pass # No Parquet engine (pyarrow / fastparquet) installed
+    return df
+
+def write_cache(data, stamps):
+    """Stores the aggregated data, drops shards of removed files and commits the manifest last."""
+    try:
+        data.to_parquet(AGGREGATE_CACHE, compression='zstd')
+    except ImportError:
+        return
+    for entry in os.scandir(SHARD_DIR):
+        if entry.name.removesuffix(".parquet") not in stamps:
+            os.remove(entry.path)
+    write_manifest(stamps)
+
+def parse_csv(filename):
+    """Reads the known columns of one result CSV with their CSV_DTYPES types."""
+    if pa_csv is not None:
+        table = pa_csv.read_csv(filename, convert_options=ARROW_CONVERT_OPTIONS)
+        # Tolerate padded headers ("impl, P") like skipinitialspace does; the cast covers their columns
+        names = [name.strip() for name in table.column_names]
+        df = table.rename_columns(names).select([n for n in names if n in CSV_DTYPES]).to_pandas()
+        return df.astype({col: CSV_DTYPES[col] for col in df.columns})
+
+    # Unknown extra columns are not materialised; a callable tolerates absent ones (e.g. old p999)
+    return pd.read_csv(filename, dtype=CSV_DTYPES, usecols=lambda col: col in CSV_DTYPES,
+                       skipinitialspace=True)
+
+def read_result_file(filename):
+    """Parses one result CSV into a typed DataFrame, or returns None if it is unusable."""
+    fname = os.path.basename(filename)
+    try:
+        df = parse_csv(filename)
+    except ValueError as e: # Includes pyarrow's ArrowInvalid
+        print(f"Warning: Skipping malformed file {fname} ({e})")
+        return None
+
+    # Backward compatibility for older CSV formats
+    if 'p999' not in df.columns and 'max_lat' in df.columns:
+        df['p999'] = df['max_lat']
+    missing = set(CSV_DTYPES) - set(df.columns)
+    if missing:
+        print(f"Warning: Skipping {fname} (missing columns: {', '.join(sorted(missing))})")
+        return None
+
+    # Determine configuration from filename
+    is_pool = "pool" in fname and "nopool" not in fname
+    is_backoff = "backoff" in fname and "nobackoff" not in fname
+    df['is_pool'] = is_pool
+    df['is_backoff'] = is_backoff
+    df['mode_name'] = get_mode_name(is_pool, is_backoff)
+    df['raw_impl'] = df.pop('impl').str.strip()
+    return df
+
 def load_data():
     """
     Parses all CSV files in the RESULTS_DIR and aggregates them.
-    Returns a list of dictionaries containing median values for each configuration.
+    Returns a DataFrame containing median values for each configuration.
     """
     if not os.path.exists(RESULTS_DIR):
         print(f"Error: Directory '{RESULTS_DIR}' not found.")
-        return []
+        return pd.DataFrame()
 
-    files = glob.glob(os.path.join(RESULTS_DIR, "*.csv"))
+    # Single directory scan; sorted so the concatenation order is deterministic
+    files = sorted(entry.path for entry in os.scandir(RESULTS_DIR)
+                   if entry.name.endswith(".csv") and entry.is_file())
     if not files:
         print(f"Error: No CSV files found in {RESULTS_DIR}/")
-        return []
-
-    print(f"Loading {len(files)} CSV files...")
-    raw_groups = defaultdict(list)
+        return pd.DataFrame()
+
+    stamps = {os.path.basename(f): file_stamp(f) for f in files}
+    cached_stamps = read_manifest()
+    if cached_stamps == stamps:
+        try:
+            cached = pd.read_parquet(AGGREGATE_CACHE)
+            print(f"Loaded {len(cached)} configurations from cache ({CACHE_DIR}/)")
+            return cached
+        except (OSError, ValueError, ImportError):
+            pass
+
+    # Invalidate before touching any shard; the manifest is rewritten once all of them are current
+    os.makedirs(SHARD_DIR, exist_ok=True)
+    if os.path.exists(MANIFEST_FILE):
+        os.remove(MANIFEST_FILE)
+
+    stale = sum(cached_stamps.get(name) != stamp for name, stamp in stamps.items())
+    print(f"Loading {len(files)} CSV files ({stale} changed since the last run)...")
     
-    for filename in files:
-        fname = os.path.basename(filename)
-        # Determine configuration from filename
-        is_pool = "pool" in fname and "nopool" not in fname
-        is_backoff = "backoff" in fname and "nobackoff" not in fname
-        
-        with open(filename, newline='') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                try:
-                    impl = row['impl'].strip()
-                    p_val = int(row['P'])
-                    c_val = int(row['C'])
-                    payload = int(row['payload_us'])
-                    
-                    # Group key for aggregation
-                    key = (impl, is_pool, is_backoff, p_val, c_val, payload)
-                    
-                    entry = {
-                        'throughput_prod': float(row['throughput_prod']),
-                        'throughput_cons': float(row['throughput_cons']),
-                        'avg_lat': float(row['avg_lat']) / 1000.0,       # Convert ns to us
-                        'p50': float(row['p50']) / 1000.0,
-                        'p99': float(row['p99']) / 1000.0,
-                        'p999': float(row['p999']) / 1000.0,
-                        'max_lat': float(row['max_lat']) / 1000.0,
-                        'peak_mem_mb': float(row['peak_mem_kb']) / 1024.0, # Convert KB to MB
-                        'max_depth': int(row['max_depth'])
-                    }
-                    raw_groups[key].append(entry)
-                except (KeyError, ValueError) as e:
-                    # Backward compatibility for older CSV formats
-                    if 'p999' not in entry and 'max_lat' in entry:
-                         entry['p999'] = entry['max_lat']
-                    continue
-
-    aggregated_data = []
-    print(f"Aggregating data from {len(raw_groups)} configurations (Median of runs)...")
+    # The C parser releases the GIL, so files are parsed concurrently (map keeps input order);
+    # beyond ~8 readers the small files are bound by disk bandwidth, not CPU
+    old = [cached_stamps.get(os.path.basename(f)) for f in files]
+    with ThreadPoolExecutor(max_workers=min(len(files), 8, os.cpu_count() or 4)) as executor:
+        frames = [df for df in executor.map(load_result_file, files, old, stamps.values())
+                  if df is not None]
+
+    if not frames:
+        return pd.DataFrame()
+
+    raw = pd.concat(frames, ignore_index=True)
+
+    grouped = raw.groupby(GROUP_KEYS, sort=False)
+    print(f"Aggregating data from {grouped.ngroups} configurations (Median of runs)...")
     
-    # Calculate median for each metric to exclude outliers
-    for key, entries in raw_groups.items():
-        impl, is_pool, is_backoff, p_val, c_val, payload = key
-        
-        final_entry = {
-            'raw_impl': impl,
-            'is_pool': is_pool,
-            'is_backoff': is_backoff,
-            'mode_name': get_mode_name(is_pool, is_backoff),
-            'display_impl': impl, 
-            'P': p_val,
-            'C': c_val,
-            'payload_us': payload,
-            'runs_count': len(entries)
-        }
-        
-        metrics = ['throughput_prod', 'throughput_cons', 
-                   'avg_lat', 'p50', 'p99', 'p999', 'max_lat', 
-                   'peak_mem_mb', 'max_depth']
-        for metric in metrics:
-            vals = [e[metric] for e in entries]
-            final_entry[metric] = np.median(vals)
-            
-        aggregated_data.append(final_entry)
+    # Calculate median for each metric to exclude outliers (single aggregation pass)
+    aggregated_data = grouped.agg(**{metric: (metric, 'median') for metric in METRICS},
+                                  runs_count=('throughput_cons', 'size')).reset_index()
+
+    # Unit conversions (the median is scale-invariant, so convert once per configuration)
+    aggregated_data[LATENCY_COLS] /= 1000.0 # Convert ns to us
+    aggregated_data['peak_mem_mb'] = aggregated_data.pop('peak_mem_kb') / 1024.0 # Convert KB to MB
+
+    # Efficiency vs. theoretical maximum throughput (Ideal = Threads / TaskTime); undefined at 0us
+    payload = aggregated_data['payload_us'].where(aggregated_data['payload_us'] > 0)
+    ideal = aggregated_data['C'] * (1_000_000.0 / payload)
+    aggregated_data['efficiency'] = (aggregated_data['throughput_cons'] / ideal) * 100.0
+
+    # Thread sweeps are plotted as "Threads (P=C)"; asymmetric runs are kept out of them
+    aggregated_data['pc_equal'] = aggregated_data['P'].to_numpy() == aggregated_data['C'].to_numpy()
+
+    # Few distinct labels: categoricals make the per-chart filters integer-code comparisons
+    aggregated_data[['raw_impl', 'mode_name']] = aggregated_data[['raw_impl', 'mode_name']].astype('category')
+    aggregated_data['display_impl'] = aggregated_data['raw_impl']
+
+    write_cache(aggregated_data, stamps)
         
     return aggregated_data
 
+# ==========================================
+# Helper: Shared Figure
+# ==========================================
+
+# Figure reused by every chart rendered in this process (see get_figure)
+_FIGURE = None
+SAVE_DPI = 100
+
+def get_figure(figsize, layout=None):
+    """Returns this process' shared Figure, cleared and resized for the next chart."""
+    global _FIGURE
+    if _FIGURE is None:
+        _FIGURE = plt.figure()
+    _FIGURE.clear()
+    _FIGURE.set_size_inches(figsize)
+    _FIGURE.set_layout_engine(layout)
+    return _FIGURE
+
+def save_figure(fig, filename):
+    """Writes the figure to RESULTS_DIR as PNG."""
+    path = os.path.join(RESULTS_DIR, filename)
+    # zlib level 1 instead of the default 6: slightly larger files, far less encode time;
+    # dpi is pinned so a user matplotlibrc cannot inflate the rasterised image
+    fig.savefig(path, dpi=SAVE_DPI, pil_kwargs={'compress_level': 1})
+    print(f"✓ Saved {path}")
+
 # ==========================================
 # Helper: Generic Line Plotter
 # ==========================================
+def select_mode(rows, key):
+    """
+    Returns the rows of the mode a chart shows, and its name: the optimized
+    configuration if present, otherwise the mode covering the most distinct
+    `key` values (ties go to the earlier mode of MODES_ORDER).
+    """
+    if (rows['mode_name'] == TARGET_MODE).any():
+        mode = TARGET_MODE
+    elif rows.empty:
+        return rows, TARGET_MODE
+    else:
+        # Spot-check CSVs give every mode a single point; a swept mode has many
+        coverage = rows.groupby('mode_name', observed=True)[key].nunique()
+        mode = coverage.reindex(MODES_ORDER, fill_value=0).idxmax()
+    return rows[rows['mode_name'] == mode], mode
+
+def m4_downsample(xy, n_buckets):
+    """
+    M4 reduction of an x-sorted (n, 2) series: splits the x range into `n_buckets`
+    equal-width buckets and keeps the first, last, min and max point of each.
+    Approximate: the rasterised line only matches the full series when each bucket
+    is at most one pixel column wide.
+    """
+    edges = np.linspace(xy[0, 0], xy[-1, 0], n_buckets + 1)[1:-1]
+    bounds = np.concatenate(([0], np.searchsorted(xy[:, 0], edges), [len(xy)]))
+    keep = set()
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        if start == stop:
+            continue
+        y = xy[start:stop, 1]
+        keep.update((start, stop - 1, start + int(np.argmin(y)), start + int(np.argmax(y))))
+    return xy[sorted(keep)]
+
 def plot_simple_line(data, x_key, y_key, title_main, y_label, filename, log_scale=False, y_limit=None):
     """Generates a line chart for a specific metric across implementations."""
-    target_mode = "Pool / Backoff"
-    
-    # Filter for the optimized configuration first
-    subset = [d for d in data if d['mode_name'] == target_mode]
-    
-    # Fallback if specific mode data is missing
-    if not subset:
-        subset = data
-        title_suffix = " (All Modes)"
-    else:
-        title_suffix = f" ({target_mode})"
+    # One mode per chart, so no (impl, x) point is drawn from two configurations
+    subset, mode = select_mode(data, x_key)
+    title_suffix = f" ({mode})"
 
-    raw_impls = sorted(list(set(d['raw_impl'] for d in subset)))
+    fig = get_figure((10, 6), layout='constrained')
+    ax = fig.add_subplot()
     
-    plt.figure(figsize=(10, 6))
+    # One sort by (impl, x) gives groups in legend order with rows already ordered by x
+    # (raw_impl is categorical: observed=True skips implementations absent from this chart)
+    ordered = subset.sort_values(['raw_impl', x_key], kind='stable')
+    # Draw cost is bounded by the pixel width, not the row count. Rounding the bucket
+    # count up to a power of two keeps every bucket narrower than a pixel column of the axes
+    n_buckets = 1 << (int(fig.get_figwidth() * SAVE_DPI) - 1).bit_length()
+    impls, segments, marked = [], [], []
+    for impl, rows in ordered.groupby('raw_impl', sort=False, observed=True):
+        # Single float64 (n, 2) block, used directly as the line's vertices
+        xy = rows[[x_key, y_key]].to_numpy(dtype=np.float64)
+        # M4 keeps up to 4 points per bucket, so only longer series actually shrink
+        dense = len(xy) > 4 * n_buckets
+        impls.append(impl)
+        segments.append(m4_downsample(xy, n_buckets) if dense else xy)
+        marked.append(not dense) # Per-point markers would only blur a dense series
+    colors = [LINE_COLOR.get(impl, LINE_COLOR_DEFAULT) for impl in impls]
+
+    # All series in one collection plus one scatter for the markers: two artists, not one per impl.
+    # Both are rasterized below the axes' zorder-2 cutoff; axes and text stay vector
+    if segments:
+        ax.add_collection(LineCollection(segments, colors=colors, rasterized=True, zorder=1, **LINE_STYLE))
+    if any(marked):
+        points = np.concatenate([seg for seg, m in zip(segments, marked) if m])
+        point_colors = np.repeat([c for c, m in zip(colors, marked) if m],
+                                 [len(seg) for seg, m in zip(segments, marked) if m])
+        ax.scatter(points[:, 0], points[:, 1], c=point_colors, marker=LINE_MARKER,
+                   alpha=LINE_STYLE['alpha'], rasterized=True, zorder=1)
+    ax.set_rasterization_zorder(2)
+    ax.autoscale_view()
+
+    ax.set_title(title_main + title_suffix)
+    ax.set_xlabel("Threads (P=C)" if x_key == 'P' else "Payload Size (μs)")
+    ax.set_ylabel(y_label)
+    if log_scale: ax.set_yscale('log')
+    if y_limit: ax.set_ylim(y_limit)
+    # Collections have no per-series legend entries, so each impl gets a proxy line
+    ax.legend([Line2D([], [], color=c, marker=LINE_MARKER if m else None, **LINE_STYLE)
+               for c, m in zip(colors, marked)], impls)
+    ax.grid(True, which="both", ls="-", alpha=0.3)
     
-    for impl in raw_impls:
-        rows = sorted([d for d in subset if d['raw_impl'] == impl], key=lambda r: r[x_key])
-        if not rows: continue
-        
-        color = COLOR_MAP_IMPL.get(impl, ('gray', 'black'))[1]
-        
-        x = [r[x_key] for r in rows]
-        y = [r[y_key] for r in rows]
-        
-        plt.plot(x, y, label=impl, color=color, marker='o', linewidth=2.5, alpha=0.9)
-        
-    plt.title(title_main + title_suffix)
-    plt.xlabel("Threads (P=C)" if x_key == 'P' else "Payload Size (μs)")
-    plt.ylabel(y_label)
-    if log_scale: plt.yscale('log')
-    if y_limit: plt.ylim(y_limit)
-    plt.legend()
-    plt.grid(True, which="both", ls="-", alpha=0.3)
-    
-    plt.tight_layout()
-    plt.savefig(f"{RESULTS_DIR}/{filename}")
-    print(f"✓ Saved {RESULTS_DIR}/{filename}")
-    plt.close()
+    save_figure(fig, filename)
 
 # ==========================================
 # Chart Logic Wrappers
+# (`subset` holds the rows main() selected for the chart's base parameter)
 # ==========================================
 
 # 1a. Consumer Throughput Scalability
-def plot_throughput_scalability(data, target_payload):
-    subset = [d for d in data if d['payload_us'] == target_payload]
-    for d in subset: d['_tp_million'] = d['throughput_cons'] / 1_000_000
+def plot_throughput_scalability(subset, target_payload):
+    subset = subset.assign(_tp_million=subset['throughput_cons'] / 1_000_000)
     plot_simple_line(subset, 'P', '_tp_million', f"Consumer Throughput (Payload={target_payload}μs)", 
                      "Throughput (M ops/sec)", "1_throughput_scalability.png")
 
 # 1b. Producer Throughput Scalability
-def plot_producer_throughput_scalability(data, target_payload):
-    subset = [d for d in data if d['payload_us'] == target_payload]
-    for d in subset: d['_tp_million'] = d['throughput_prod'] / 1_000_000
+def plot_producer_throughput_scalability(subset, target_payload):
+    subset = subset.assign(_tp_million=subset['throughput_prod'] / 1_000_000)
     plot_simple_line(subset, 'P', '_tp_million', f"Producer Throughput (Payload={target_payload}μs)", 
                      "Throughput (M ops/sec)", "1b_producer_throughput_scalability.png")
 
 # 2. Tail Latency Scalability (P99.9)
-def plot_latency_scalability(data, target_payload):
-    subset = [d for d in data if d['payload_us'] == target_payload]
+def plot_latency_scalability(subset, target_payload):
     plot_simple_line(subset, 'P', 'p999', f"P99.9 Latency (Payload={target_payload}μs)", 
                      "Latency (μs)", "2_latency_scalability_p999.png", log_scale=True)
 
 # 3. Latency Distribution (Bar Chart: P50, P99, P99.9, Max)
-def plot_latency_distribution(data, target_payload):
-    target_mode = "Pool / Backoff"
+def plot_latency_distribution(subset, target_payload):
     target_p = 8 # Fixed thread count for detailed breakdown
     
-    subset = [d for d in data if d['payload_us'] == target_payload and d['P'] == target_p and d['mode_name'] == target_mode]
-    if not subset:
-        subset = [d for d in data if d['payload_us'] == target_payload and d['P'] == target_p]
-        if not subset: return
+    subset, mode = select_mode(subset[subset['P'] == target_p], 'raw_impl')
+    if subset.empty: return
 
-    subset.sort(key=lambda x: x['raw_impl'])
-    
-    labels = [d['raw_impl'] for d in subset]
-    metrics = ['p50', 'p99', 'p999', 'max_lat']
-    metric_labels = ['P50', 'P99', 'P99.9', 'Max']
-    colors = ['skyblue', 'orange', 'firebrick', 'purple']
-    
-    x = np.arange(len(labels))
-    width = 0.2
+    # One column per metric -> one BarContainer per metric
+    table = subset.sort_values('raw_impl').set_index('raw_impl')[list(LATENCY_BARS)]
+    table.columns = [label for label, _ in LATENCY_BARS.values()]
 
-    plt.figure(figsize=(12, 6))
+    fig = get_figure((12, 6), layout='constrained')
+    ax = fig.add_subplot()
     
-    for i, (metric, color, label) in enumerate(zip(metrics, colors, metric_labels)):
-        values = [d[metric] for d in subset]
-        offset = (i - 1.5) * width
-        plt.bar(x + offset, values, width, label=label, color=color, edgecolor='black')
+    table.plot.bar(ax=ax, width=0.8, color=[color for _, color in LATENCY_BARS.values()],
+                   edgecolor='black', logy=True, rot=0)
     
-    plt.xlabel('Implementation')
-    plt.ylabel('Latency (μs) - Log Scale')
-    plt.title(f'Latency Distribution (Threads={target_p} (P=C={target_p}), Payload={target_payload}μs)\n({target_mode})')
-    plt.xticks(x, labels, rotation=0)
-    plt.yscale('log')
-    plt.legend()
-    plt.grid(True, axis='y', which='both', alpha=0.3)
+    ax.set_xlabel('Implementation')
+    ax.set_ylabel('Latency (μs) - Log Scale')
+    ax.set_title(f'Latency Distribution (Threads={target_p} (P=C={target_p}), Payload={target_payload}μs)\n({mode})')
+    ax.legend()
+    ax.grid(True, axis='y', which='both', alpha=0.3)
     
-    plt.tight_layout()
-    plt.savefig(f"{RESULTS_DIR}/3_latency_distribution.png")
-    print(f"✓ Saved {RESULTS_DIR}/3_latency_distribution.png")
-    plt.close()
+    save_figure(fig, "3_latency_distribution.png")
 
 # 4. Memory Usage Scalability
-def plot_memory_scalability(data, target_payload):
-    subset = [d for d in data if d['payload_us'] == target_payload]
+def plot_memory_scalability(subset, target_payload):
     plot_simple_line(subset, 'P', 'peak_mem_mb', f"Peak Memory (Payload={target_payload}μs)", 
                      "Memory (MB)", "4_memory_scalability.png")
 
 # 5. Queue Depth Scalability
-def plot_max_depth_scalability(data, target_payload):
-    subset = [d for d in data if d['payload_us'] == target_payload]
+def plot_max_depth_scalability(subset, target_payload):
     plot_simple_line(subset, 'P', 'max_depth', f"Max Depth (Payload={target_payload}μs)", 
                      "Depth", "5_max_depth_scalability.png")
 
 # 6. Payload Sensitivity Analysis
-def plot_payload_sensitivity(data, target_p):
-    subset = [d for d in data if d['P'] == target_p]
-    for d in subset: d['_tp_million'] = d['throughput_cons'] / 1_000_000
+def plot_payload_sensitivity(subset, target_p):
+    subset = subset.assign(_tp_million=subset['throughput_cons'] / 1_000_000)
     plot_simple_line(subset, 'payload_us', '_tp_million', f"Payload Sensitivity (P=C={target_p})", 
                      "Throughput (M ops/sec)", "6_payload_sensitivity.png")
 
 # 7. Efficiency Analysis
-def plot_efficiency_sensitivity(data, target_p):
-    subset = [d for d in data if d['P'] == target_p and d['payload_us'] > 0]
-    for d in subset:
-        # Calculate theoretical maximum throughput (Ideal = Threads / TaskTime)
-        ideal = d['C'] * (1_000_000.0 / d['payload_us'])
-        d['_eff'] = (d['throughput_cons'] / ideal) * 100.0
-    plot_simple_line(subset, 'payload_us', '_eff', f"Efficiency (P=C={target_p})", 
+def plot_efficiency_sensitivity(subset, target_p):
+    subset = subset[subset['payload_us'] > 0]
+    plot_simple_line(subset, 'payload_us', 'efficiency', f"Efficiency (P=C={target_p})", 
                      "Efficiency (%)", "7_efficiency_sensitivity.png", y_limit=(0, 110))
 
 # ==========================================
 # 8. Spot Check (Optimization Impact)
 # ==========================================
-def plot_spot_check_4_modes(data, target_p, target_payload):
+def plot_spot_check_4_modes(subset, target_p, target_payload):
     """
     Generates a 3x2 grid comparison of different optimization modes:
     - NoPool / NoBO
@@ -291,15 +522,14 @@ def plot_spot_check_4_modes(data, target_p, target_payload):
     - NoPool / Backoff
     - Pool / Backoff
     """
-    subset = [d for d in data if d['P'] == target_p and d['payload_us'] == target_payload]
-    if not subset: 
+    if subset.empty: 
         print(f"Warning: No data found for P={target_p}, Payload={target_payload}")
         return
 
-    modes_order = ['NoPool / NoBO', 'Pool / NoBO', 'NoPool / Backoff', 'Pool / Backoff']
-    impls = sorted(list(set(d['raw_impl'] for d in subset)))
+    impls = sorted(subset['raw_impl'].unique())
     
-    fig, axes = plt.subplots(3, 2, figsize=(16, 19))
+    fig = get_figure((16, 19))
+    axes = fig.subplots(3, 2)
     fig.suptitle(f"Spot Check Comparison (P=C={target_p}, Payload={target_payload}μs)\n(Median of 5 runs)", fontsize=16)
     
     charts_config = [
@@ -316,21 +546,22 @@ def plot_spot_check_4_modes(data, target_p, target_payload):
     legend_handles = []
     legend_labels = []
 
+    # One row per (impl, mode); missing combinations are plotted as 0
+    by_config = subset.drop_duplicates(['raw_impl', 'mode_name']).set_index(['raw_impl', 'mode_name'])
+
     for ax, metric, title, ylabel, scale in charts_config:
-        for i, mode in enumerate(modes_order):
-            values = []
-            for impl in impls:
-                found = next((d for d in subset if d['raw_impl'] == impl and d['mode_name'] == mode), None)
-                val = found[metric] if found else 0
-                if 'throughput' in metric: val /= 1_000_000
-                values.append(val)
+        table = by_config[metric].unstack('mode_name').reindex(index=impls, columns=MODES_ORDER).fillna(0)
+        if 'throughput' in metric: table /= 1_000_000
+
+        for i, mode in enumerate(MODES_ORDER):
+            values = table[mode].to_numpy()
             
             offset = (i - 1.5) * bar_width
             bars = ax.bar(x + offset, values, bar_width, label=mode, 
                           color=COLOR_MAP_MODE.get(mode, 'gray'), edgecolor='black')
             
             # Collect handles for the unified legend
-            if ax == axes[0, 0] and i < len(modes_order):
+            if ax == axes[0, 0] and i < len(MODES_ORDER):
                 legend_handles.append(bars)
                 legend_labels.append(mode)
 
@@ -341,7 +572,7 @@ def plot_spot_check_4_modes(data, target_p, target_payload):
         if scale == 'log': ax.set_yscale('log')
         ax.grid(True, axis='y', alpha=0.3)
 
-    plt.subplots_adjust(bottom=0.10, hspace=0.3, top=0.93)
+    fig.subplots_adjust(bottom=0.10, hspace=0.3, top=0.93)
     
     fig.legend(legend_handles, legend_labels, 
                loc='lower center',            
@@ -352,53 +583,84 @@ def plot_spot_check_4_modes(data, target_p, target_payload):
                frameon=True, fancybox=True, shadow=True)
 
     output_file = f"8_spot_check_P{target_p}_Payload{target_payload}.png"
-    plt.savefig(os.path.join(RESULTS_DIR, output_file))
-    print(f"✓ Saved {os.path.join(RESULTS_DIR, output_file)}")
-    plt.close()
+    save_figure(fig, output_file)
 
 # ==========================================
 # Main Execution
 # ==========================================
+def most_swept(data, key, swept):
+    """Returns the `key` value seen with the most distinct `swept` values (smallest on ties)."""
+    # groupby sorts the keys ascending and idxmax keeps the first maximum
+    counts = data.groupby(key)[swept].nunique()
+    return None if counts.empty else int(counts.idxmax())
+
 def detect_base_params(data):
     """Auto-detects the most common parameter set in the result data."""
-    main_data = [d for d in data if d['is_pool'] and d['is_backoff']]
-    if not main_data: main_data = data
+    # Same P=C rows the 'load' and 'threads' views are drawn from
+    data = data[data['pc_equal']]
+    main_data = data[data['is_pool'] & data['is_backoff']]
+    if main_data.empty: main_data = data
     
-    counts = defaultdict(set)
-    for d in main_data: counts[d['payload_us']].add(d['P'])
-    p_load = max(counts.items(), key=lambda x: len(x[1]))[0] if counts else None
-
-    counts = defaultdict(set)
-    for d in main_data: counts[d['P']].add(d['payload_us'])
-    p_threads = max(counts.items(), key=lambda x: len(x[1]))[0] if counts else None
+    p_load = most_swept(main_data, 'payload_us', 'P')
+    p_threads = most_swept(main_data, 'P', 'payload_us')
     
     return p_load, p_threads
 
+# Row subsets of a plot worker process, by name (set once by _init_plot_worker)
+_PLOT_VIEWS = None
+
+def _init_plot_worker(views):
+    """Stores the row subsets in a new worker so tasks do not carry them."""
+    global _PLOT_VIEWS
+    _PLOT_VIEWS = views
+
+def _dispatch(task):
+    """Runs a single (plot_function, view, args) task on the named row subset."""
+    func, view, args = task
+    func(_PLOT_VIEWS[view], *args)
+
 def main():
     data = load_data()
-    if not data: return
+    if data.empty: return
     
     p_load, p_threads = detect_base_params(data)
     print(f"\nDetected Base Parameters:\n  - Payload: {p_load} us\n  - Threads: {p_threads}")
     
-    # Generate charts
+    # Each row subset is selected once and shared by every chart drawn from it.
+    # Charts only read their subset and write distinct files, so they are rendered in parallel.
+    views = {}
+    tasks = []
     if p_load is not None:
-        plot_throughput_scalability(data, p_load)
-        plot_producer_throughput_scalability(data, p_load)
-        plot_latency_scalability(data, p_load)
-        plot_latency_distribution(data, p_load)
-        plot_memory_scalability(data, p_load)
-        plot_max_depth_scalability(data, p_load)
+        views['load'] = data[(data['payload_us'] == p_load) & data['pc_equal']]
+        tasks += [
+            (plot_throughput_scalability, 'load', (p_load,)),
+            (plot_producer_throughput_scalability, 'load', (p_load,)),
+            (plot_latency_scalability, 'load', (p_load,)),
+            (plot_latency_distribution, 'load', (p_load,)),
+            (plot_memory_scalability, 'load', (p_load,)),
+            (plot_max_depth_scalability, 'load', (p_load,)),
+        ]
     
     if p_threads is not None:
-        plot_payload_sensitivity(data, p_threads)
-        plot_efficiency_sensitivity(data, p_threads)
+        views['threads'] = data[(data['P'] == p_threads) & data['pc_equal']]
+        tasks += [
+            (plot_payload_sensitivity, 'threads', (p_threads,)),
+            (plot_efficiency_sensitivity, 'threads', (p_threads,)),
+        ]
         
     # Generate Spot Check for specific scenario (P=8, Payload=3)
     spot_check_p = 8
     spot_check_payload = 3
     print(f"\nGenerating Spot Check for P={spot_check_p}, Payload={spot_check_payload}...")
-    plot_spot_check_4_modes(data, spot_check_p, spot_check_payload)
+    views['spot'] = data[(data['P'] == spot_check_p) & (data['payload_us'] == spot_check_payload)]
+    tasks.append((plot_spot_check_4_modes, 'spot', (spot_check_p, spot_check_payload)))
+
+    # Forked workers inherit `views` without pickling; other platforms send it once per worker
+    ctx = multiprocessing.get_context('fork') if 'fork' in multiprocessing.get_all_start_methods() else None
+    with ProcessPoolExecutor(max_workers=min(len(tasks), os.cpu_count() or 1), mp_context=ctx,
+                             initializer=_init_plot_worker, initargs=(views,)) as executor:
+        # Consume the results so worker exceptions are re-raised here
+        list(executor.map(_dispatch, tasks))
 
     print("\n✅ All plots generated successfully!")
 